@@ -1,52 +1,75 @@
+import heapq
 import re
-import unicodedata
-from dataclasses import dataclass
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
 import fitz  # pymupdf
 
+# Allow running as a script from repo root without turning `scripts/` into a package.
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from md_keys import PUNCT_CHARS, iter_md, nfkc  # noqa: E402
+
+
+TOC_NUMBER_RE = re.compile(r"^\s*(\d+(?:\.\d+)*)(?:\.)?\s+(.+?)?\s*$")
+
 
 @dataclass(frozen=True)
 class TocItem:
     level: int
     title: str
     page: int  # 1-based
+    _number_prefix: str = field(init=False, repr=False, compare=False)
+    _title_wo_number: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Parse the section number once; both properties are read in the TOC loop.
+        m = TOC_NUMBER_RE.match(self.title)
+        prefix = m.group(1) if m else ""
+        rest = m.group(2) if m and m.group(2) else self.title.strip()
+        object.__setattr__(self, "_number_prefix", prefix)
+        object.__setattr__(self, "_title_wo_number", rest)
 
     @property
     def number_prefix(self) -> str:
-        m = re.match(r"^\s*(\d+(?:\.\d+)*)(?:\.)?\s+", self.title)
-        return m.group(1) if m else ""
+        return self._number_prefix
 
     @property
     def title_wo_number(self) -> str:
-        m = re.match(r"^\s*\d+(?:\.\d+)*(?:\.)?\s+(.+?)\s*$", self.title)
-        return m.group(1) if m else self.title.strip()
+        return self._title_wo_number
 
 
 HEADING_RE = re.compile(r"^\s*(#{1,6})\s+(.+?)\s*$")
+PUNCT_TABLE = str.maketrans("", "", PUNCT_CHARS)
 
 
+@lru_cache(maxsize=4096)
 def norm_key(s: str) -> str:
-    s = unicodedata.normalize("NFKC", s)
+    s = nfkc(s)
     s = s.strip().lower()
-    # Drop common punctuation/spaces
-    s = re.sub(r"[\s·•・、，,。．.：:；;！!？?\(\)（）\[\]【】《》“”\"'‘’`]+", "", s)
-    return s
+    return s.translate(PUNCT_TABLE)
 
 
 def md_first_title(md_path: Path) -> str:
-    try:
-        text = md_path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        text = md_path.read_text(encoding="utf-8", errors="replace")
-
-    for line in text.splitlines()[:80]:
-        m = HEADING_RE.match(line)
-        if m:
-            return m.group(2).strip()
+    # Stream lines: the title is almost always near the top, no need to decode the whole file.
+    with md_path.open("r", encoding="utf-8", errors="replace") as f:
+        for i, line in enumerate(f):
+            if i >= 80:
+                break
+            m = HEADING_RE.match(line)
+            if m:
+                return m.group(2).strip()
     return md_path.stem
 
 
+def _shortest_path_key(p: Path) -> tuple[int, str]:
+    s = str(p)
+    return len(s), s
+
+
 def section_root_dir(major: str) -> str | None:
     # Map PDF major section number -> docs subtree
     return {
@@ -62,20 +85,21 @@ def main() -> None:
     pdf = Path("originFab/Project Moon Trpg Rule Book V1.8.4.pdf")
     out = Path("docs/PDF章节页码映射.md")
 
-    doc = fitz.open(str(pdf))
-    toc_raw = doc.get_toc(simple=True)
+    with fitz.open(str(pdf)) as doc:
+        toc_raw = doc.get_toc(simple=True)
     toc: list[TocItem] = [TocItem(level=l, title=t, page=p) for l, t, p in toc_raw]
 
-    md_files = [p for p in Path("docs").rglob("*.md") if p.name not in {"PDF图片索引.md", "PDF章节页码映射.md"}]
+    md_files = list(iter_md(Path("docs")))
 
     # Build lookup: normalized title -> list[Path]
-    title_map: dict[str, list[Path]] = {}
+    title_map: defaultdict[str, list[Path]] = defaultdict(list)
     for p in md_files:
-        title = md_first_title(p)
-        for k in {norm_key(title), norm_key(p.stem)}:
-            if not k:
-                continue
-            title_map.setdefault(k, []).append(p)
+        title_k = norm_key(md_first_title(p))
+        stem_k = norm_key(p.stem)
+        if title_k:
+            title_map[title_k].append(p)
+        if stem_k and stem_k != title_k:
+            title_map[stem_k].append(p)
 
     matched: dict[int, list[Path]] = {}
     unmatched: list[TocItem] = []
@@ -102,43 +126,42 @@ def main() -> None:
                 cands = rooted
 
         # If still ambiguous, keep up to 3 shortest paths
-        cands = sorted(cands, key=lambda p: (len(str(p)), str(p)))[:3]
+        cands = heapq.nsmallest(3, cands, key=_shortest_path_key)
         matched[i] = cands
 
-    lines: list[str] = []
-    lines.append("#### PDF章节页码映射（基于书签目录）")
-    lines.append("")
-    lines.append(f"来源：`{pdf.as_posix()}`")
-    lines.append("")
-    lines.append("- 页码链接指向整页缩略图：`assets/pdf_pages_small/page_XXX.jpg`")
-    lines.append("- 章节链接指向仓库内对应 `docs/**/*.md` 文件（自动匹配，少量可能需人工确认）")
-    lines.append("")
-    lines.append("## 目录 → 页码 → Markdown")
-    lines.append("")
-
-    for idx, item in enumerate(toc):
-        indent = "  " * max(0, item.level - 1)
-        page_link = f"[P{item.page:03d}](../assets/pdf_pages_small/page_{item.page:03d}.jpg)"
-        md_links = ""
-        if idx in matched:
-            rels = []
-            for p in matched[idx]:
-                rel = p.as_posix().removeprefix("docs/")
-                rels.append(f"[`docs/{rel}`]({rel})")
-            md_links = " → " + ", ".join(rels)
-        else:
-            md_links = " → （未匹配）"
-        lines.append(f"{indent}- **{item.title}**（{page_link}）{md_links}")
-
-    if unmatched:
-        lines.append("")
-        lines.append("## 未匹配清单（需要人工确认）")
-        lines.append("")
-        for item in unmatched:
+    with out.open("w", encoding="utf-8") as f:
+        f.write("#### PDF章节页码映射（基于书签目录）\n")
+        f.write("\n")
+        f.write(f"来源：`{pdf.as_posix()}`\n")
+        f.write("\n")
+        f.write("- 页码链接指向整页缩略图：`assets/pdf_pages_small/page_XXX.jpg`\n")
+        f.write("- 章节链接指向仓库内对应 `docs/**/*.md` 文件（自动匹配，少量可能需人工确认）\n")
+        f.write("\n")
+        f.write("## 目录 → 页码 → Markdown\n")
+        f.write("\n")
+
+        for idx, item in enumerate(toc):
+            indent = "  " * max(0, item.level - 1)
             page_link = f"[P{item.page:03d}](../assets/pdf_pages_small/page_{item.page:03d}.jpg)"
-            lines.append(f"- **{item.title}**（{page_link}）")
+            md_links = ""
+            if idx in matched:
+                rels = []
+                for p in matched[idx]:
+                    rel = p.as_posix().removeprefix("docs/")
+                    rels.append(f"[`docs/{rel}`]({rel})")
+                md_links = " → " + ", ".join(rels)
+            else:
+                md_links = " → （未匹配）"
+            f.write(f"{indent}- **{item.title}**（{page_link}）{md_links}\n")
+
+        if unmatched:
+            f.write("\n")
+            f.write("## 未匹配清单（需要人工确认）\n")
+            f.write("\n")
+            for item in unmatched:
+                page_link = f"[P{item.page:03d}](../assets/pdf_pages_small/page_{item.page:03d}.jpg)"
+                f.write(f"- **{item.title}**（{page_link}）\n")
 
-    out.write_text("\n".join(lines) + "\n", encoding="utf-8")
     print("wrote", out)
     print("toc_items", len(toc))
     print("md_files", len(md_files))
@@ -5,8 +5,8 @@ import fitz  # pymupdf
 
 def main() -> None:
     pdf = Path("originFab/Project Moon Trpg Rule Book V1.8.4.pdf")
-    doc = fitz.open(str(pdf))
-    toc = doc.get_toc(simple=True)
+    with fitz.open(str(pdf)) as doc:
+        toc = doc.get_toc(simple=True)
 
     out_lines: list[str] = []
     for lvl, title, page in toc[:50]:
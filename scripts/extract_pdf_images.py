@@ -1,11 +1,23 @@
 import argparse
 import hashlib
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
 import fitz  # pymupdf
 
+try:
+    import xxhash
+except ImportError:  # optional: fall back to stdlib blake2b
+    xxhash = None
+
+
+# Image payloads travel back to the parent, so chunks are kept small and only a few are in flight.
+MAX_CHUNK_PAGES = 16
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
 
 @dataclass
 class ExtractedImage:
@@ -15,10 +27,59 @@ class ExtractedImage:
     path: Path
 
 
-def sha1(data: bytes) -> str:
-    h = hashlib.sha1()
-    h.update(data)
-    return h.hexdigest()
+def image_digest(data: bytes) -> str:
+    # Only used as an in-memory dedup key, so a fast non-cryptographic hash is enough.
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def process_pages(
+    pdf_path: str, page_indices: range, min_bytes: int
+) -> tuple[list[tuple[bytes, str, int, int]], int, int]:
+    """
+    Extract raw image payloads of a contiguous run of pages.
+
+    Runs in a worker process, so it opens its own document (MuPDF documents are not fork-safe).
+    An xref already seen in this run is not decoded again: rule-book pages repeat the same
+    decorative images, and the repeat would only be dropped as small or duplicate later anyway.
+    Returns ([(data, ext, page_no, index)], skipped_small, skipped_dupe).
+    """
+    found: list[tuple[bytes, str, int, int]] = []
+    skipped_small = 0
+    skipped_dupe = 0
+    # xref -> whether its payload was too small
+    seen_xrefs: dict[int, bool] = {}
+
+    with fitz.open(pdf_path) as doc:
+        for page_idx in page_indices:
+            page_no = page_idx + 1
+            imgs = doc[page_idx].get_images(full=True)
+            for j, img in enumerate(imgs, start=1):
+                xref = img[0]
+                if xref in seen_xrefs:
+                    if seen_xrefs[xref]:
+                        skipped_small += 1
+                    else:
+                        skipped_dupe += 1
+                    continue
+
+                base = doc.extract_image(xref)
+                data = base.get("image", b"")
+                small = not data or len(data) < min_bytes
+                seen_xrefs[xref] = small
+                if small:
+                    skipped_small += 1
+                    continue
+
+                ext = base.get("ext", "bin")
+                # Normalize common ext
+                if ext.lower() == "jpeg":
+                    ext = "jpg"
+                ext = ext.lower()
+                found.append((data, ext, page_no, j))
+
+    return found, skipped_small, skipped_dupe
 
 
 def main() -> None:
@@ -26,50 +87,61 @@ def main() -> None:
     ap.add_argument("--pdf", required=True, help="PDF path")
     ap.add_argument("--out", default="assets/pdf_images", help="Output directory")
     ap.add_argument("--min-bytes", type=int, default=2048, help="Skip tiny images below this size")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=min(os.cpu_count() or 1, 6),
+        help="Worker processes (default: min(cpu_count, 6))",
+    )
     args = ap.parse_args()
 
     pdf_path = Path(args.pdf)
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    doc = fitz.open(str(pdf_path))
+    with fitz.open(str(pdf_path)) as doc:
+        page_count = doc.page_count
 
     seen_hashes: set[str] = set()
     extracted: list[ExtractedImage] = []
     skipped_dupe = 0
     skipped_small = 0
 
-    for page_idx in range(doc.page_count):
-        page_no = page_idx + 1
-        page = doc[page_idx]
-        imgs = page.get_images(full=True)
-        for j, img in enumerate(imgs, start=1):
-            xref = img[0]
-            base = doc.extract_image(xref)
-            data = base.get("image", b"")
-            if not data or len(data) < args.min_bytes:
-                skipped_small += 1
-                continue
-
-            h = sha1(data)
-            if h in seen_hashes:
-                skipped_dupe += 1
-                continue
-            seen_hashes.add(h)
-
-            ext = base.get("ext", "bin")
-            # Normalize common ext
-            if ext.lower() == "jpeg":
-                ext = "jpg"
-            ext = ext.lower()
-
-            fname = f"page_{page_no:03d}_img_{j:02d}.{ext}"
-            out_path = out_dir / fname
-            out_path.write_bytes(data)
-            extracted.append(ExtractedImage(page=page_no, index=j, ext=ext, path=out_path))
+    workers = max(1, args.workers)
+    # A few chunks per worker for balance, capped so one result never holds much of a large PDF.
+    chunk = max(1, min(MAX_CHUNK_PAGES, -(-page_count // (workers * 4))))
+    chunks = (range(i, min(i + chunk, page_count)) for i in range(0, page_count, chunk))
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+
+        def submit_next() -> None:
+            pages = next(chunks, None)
+            if pages is not None:
+                pending.append(ex.submit(process_pages, str(pdf_path), pages, args.min_bytes))
+
+        for _ in range(workers * CHUNKS_IN_FLIGHT_PER_WORKER):
+            submit_next()
+        # Results are taken in page order, so "first occurrence wins" dedup stays deterministic.
+        while pending:
+            found, small, dupe = pending.popleft().result()
+            submit_next()
+            skipped_small += small
+            skipped_dupe += dupe
+            for data, ext, page_no, j in found:
+                h = image_digest(data)
+                if h in seen_hashes:
+                    skipped_dupe += 1
+                    continue
+                seen_hashes.add(h)
+
+                fname = f"page_{page_no:03d}_img_{j:02d}.{ext}"
+                out_path = out_dir / fname
+                out_path.write_bytes(data)
+                extracted.append(ExtractedImage(page=page_no, index=j, ext=ext, path=out_path))
 
     # Summary
-    print("pdf_pages", doc.page_count)
+    print("pdf_pages", page_count)
     print("images_extracted", len(extracted))
     print("skipped_dupe", skipped_dupe)
     print("skipped_small", skipped_small)
@@ -78,4 +150,3 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
-
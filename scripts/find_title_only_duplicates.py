@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 import re
-import unicodedata
+import sys
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable
+
+# Allow running as a script from repo root without turning `scripts/` into a package.
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from md_keys import PUNCT_CHARS, iter_md, nfkc  # noqa: E402
 
 
 HEADING_RE = re.compile(r"^\s*(#{1,6})\s+(.+?)\s*$")
+HTML_TAG_RE = re.compile(r"</?[^>]+?>")
+# Markdown emphasis markers are dropped too: titles are often wrapped in them
+PUNCT_TABLE = str.maketrans("", "", PUNCT_CHARS + "*_~")
+# Files above this size are only parsed from their first HEAD_BYTES, unless the head is inconclusive.
+SMALL_FILE_BYTES = 4096
+HEAD_BYTES = 8192
 
 
 @dataclass(frozen=True)
@@ -16,89 +30,125 @@ class DocInfo:
     title_level: int
     body_nonempty_lines: int
     body_chars: int
+    # Only the head of the file was read: body counts are lower bounds, see full_info().
+    partial: bool = False
 
     @property
     def is_title_only(self) -> bool:
         return self.body_nonempty_lines == 0
 
 
+@lru_cache(maxsize=4096)
 def norm_key(s: str) -> str:
-    s = unicodedata.normalize("NFKC", s).strip().lower()
-    # Drop common markdown emphasis/code markers and simple HTML tags
-    s = re.sub(r"</?[^>]+?>", "", s)
-    s = s.replace("*", "").replace("_", "").replace("~", "").replace("`", "")
-    s = s.replace("\u00a0", " ")
-    s = re.sub(r"[\s·•・、，,。．.：:；;！!？?\(\)（）\[\]【】《》“”\"'‘’`]+", "", s)
-    return s
-
-
-def parse_doc(md_path: Path) -> DocInfo | None:
-    try:
-        text = md_path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        text = md_path.read_text(encoding="utf-8", errors="replace")
-
-    lines = text.splitlines()
-    # Only treat the file's title as "the first heading" if it is the first non-empty line.
-    first_nonempty_idx = None
-    for i, line in enumerate(lines[:120]):
-        if line.strip():
-            first_nonempty_idx = i
-            break
+    s = nfkc(s).strip().lower()
+    # Drop simple HTML tags first, then markers/punctuation
+    s = HTML_TAG_RE.sub("", s)
+    return s.translate(PUNCT_TABLE)
+
+
+_UNDECIDED = object()
+
 
+def _parse_lines(md_path: Path, lines: Iterable[str], head_only: bool):
+    """
+    Parse title/body out of lines in a single pass. With head_only, lines are a truncated prefix
+    of the file: stop at the first body line (the file is then certainly not title-only), and
+    return _UNDECIDED when the prefix runs out before that can be told.
+    """
+    state = "pre"
+    scanned = 0
     title = ""
     lvl = 0
-    title_idx = None
-    if first_nonempty_idx is not None:
-        m = HEADING_RE.match(lines[first_nonempty_idx])
-        if m:
-            title = m.group(2).strip()
-            # strip simple markdown emphasis noise
-            title = title.strip("*_`~ ").strip()
-            lvl = len(m.group(1))
-            title_idx = first_nonempty_idx
-
-    if not title:
-        # no top heading; skip for title-based grouping to avoid false positives
-        return None
-
-    body_lines = lines[title_idx + 1 :] if title_idx is not None else []
-    # remove whitespace-only lines; also ignore common pure separators
-    nonempty = []
-    for ln in body_lines:
-        s = ln.strip()
-        if not s:
+    body_lines = 0
+    body_chars = 0
+    trailing_ws = 0
+
+    for line in lines:
+        if state == "pre":
+            # Only treat the file's title as "the first heading" if it is the first non-empty line.
+            if scanned >= 120:
+                return None
+            scanned += 1
+            if not line.strip():
+                continue
+            m = HEADING_RE.match(line)
+            if m:
+                title = m.group(2).strip()
+                # strip simple markdown emphasis noise
+                title = title.strip("*_`~ ").strip()
+                lvl = len(m.group(1))
+            if not title:
+                # no top heading; skip for title-based grouping to avoid false positives
+                return None
+            state = "post"
             continue
-        if s in {"---", "***", "___"}:
+
+        # remove whitespace-only lines; also ignore common pure separators
+        s = line.strip()
+        if not s or s in {"---", "***", "___"}:
             continue
-        nonempty.append(ln)
+        # Count chars of "\n".join(body).strip() without keeping the lines around.
+        if body_lines:
+            body_chars += 1 + len(line)
+        else:
+            body_chars = len(line.lstrip())
+        trailing_ws = len(line) - len(line.rstrip())
+        body_lines += 1
+        if head_only:
+            break
+
+    if state == "pre":
+        return _UNDECIDED if head_only and scanned < 120 else None
+    if head_only and not body_lines:
+        return _UNDECIDED
 
-    body_text = "\n".join(nonempty).strip()
     return DocInfo(
         path=md_path,
         title=title,
         title_level=lvl,
-        body_nonempty_lines=len(nonempty),
-        body_chars=len(body_text),
+        body_nonempty_lines=body_lines,
+        body_chars=body_chars - trailing_ws,
+        partial=head_only,
     )
 
 
+def parse_doc(md_path: Path, full: bool = False) -> DocInfo | None:
+    if not full and md_path.stat().st_size > SMALL_FILE_BYTES:
+        with md_path.open("rb") as f:
+            head = f.read(HEAD_BYTES).decode("utf-8", errors="replace")
+        # The last line may be cut off (possibly mid-character); only trust complete lines.
+        info = _parse_lines(md_path, head.splitlines()[:-1], head_only=True)
+        if info is not _UNDECIDED:
+            return info
+
+    # Same line splitting as the head path (str.splitlines, not just \n / \r\n / \r).
+    text = md_path.read_text(encoding="utf-8", errors="replace")
+    return _parse_lines(md_path, text.splitlines(), head_only=False)
+
+
+@lru_cache(maxsize=None)
+def full_info(info: DocInfo) -> DocInfo:
+    """Re-read a head-only DocInfo in full when its exact body counts are needed (once per file)."""
+    if not info.partial:
+        return info
+    return parse_doc(info.path, full=True) or info
+
+
 def main() -> None:
     docs = Path("docs")
-    infos: list[DocInfo] = []
-    for p in docs.rglob("*.md"):
-        if p.name in {"PDF图片索引.md", "PDF章节页码映射.md"}:
-            continue
+    # Group by normalized title and by normalized stem in the same pass as parsing.
+    title_groups: defaultdict[str, list[DocInfo]] = defaultdict(list)
+    stem_groups: defaultdict[str, list[DocInfo]] = defaultdict(list)
+    for p in iter_md(docs):
         info = parse_doc(p)
-        if info:
-            infos.append(info)
-
-    title_groups: dict[str, list[DocInfo]] = {}
-    for info in infos:
-        k = norm_key(info.title)
-        if not k:
+        if not info:
             continue
-        title_groups.setdefault(k, []).append(info)
+        title_k = norm_key(info.title)
+        if title_k:
+            title_groups[title_k].append(info)
+        stem_k = norm_key(p.stem)
+        if stem_k:
+            stem_groups[stem_k].append(info)
 
     # candidates: same title appears in 2+ files, and at least one title-only + one non-title-only
     title_candidates: list[tuple[str, list[DocInfo], list[DocInfo]]] = []
@@ -106,68 +156,64 @@ def main() -> None:
         if len(items) < 2:
             continue
         title_only = [x for x in items if x.is_title_only]
-        non_empty = [x for x in items if not x.is_title_only]
-        if title_only and non_empty:
+        if not title_only:
+            continue
+        non_empty = [full_info(x) for x in items if not x.is_title_only]
+        if non_empty:
             title_candidates.append((k, title_only, non_empty))
 
     # sort for stable output
     title_candidates.sort(key=lambda t: (t[0], min(str(x.path) for x in t[1])))
 
     # stem-based candidates: same filename (stem) appears in 2+ files
-    stem_groups: dict[str, list[DocInfo]] = {}
-    for info in infos:
-        stem_k = norm_key(info.path.stem)
-        if not stem_k:
-            continue
-        stem_groups.setdefault(stem_k, []).append(info)
-
     stem_candidates: list[tuple[str, list[DocInfo], list[DocInfo]]] = []
     for k, items in stem_groups.items():
         if len(items) < 2:
             continue
         title_only = [x for x in items if x.is_title_only]
-        non_empty = [x for x in items if not x.is_title_only]
-        if title_only and non_empty:
+        if not title_only:
+            continue
+        non_empty = [full_info(x) for x in items if not x.is_title_only]
+        if non_empty:
             stem_candidates.append((k, title_only, non_empty))
     stem_candidates.sort(key=lambda t: (t[0], min(str(x.path) for x in t[1])))
 
-    out_lines: list[str] = []
-    out_lines.append("TITLE_ONLY_DUPLICATES_REPORT")
-    out_lines.append("")
-    out_lines.append("A) 标题同名候选：同标题分组中，若存在“仅标题无正文”的文件，且同组有正文文件，则这些仅标题文件为候选删除项。")
-    out_lines.append("")
-    out_lines.append(f"候选组数：{len(title_candidates)}")
-    out_lines.append("")
-
-    for _, title_only, non_empty in title_candidates:
-        title = title_only[0].title
-        out_lines.append(f"== {title} ==")
-        out_lines.append("title_only:")
-        for x in sorted(title_only, key=lambda i: i.path.as_posix()):
-            out_lines.append(f"- {x.path.as_posix()}")
-        out_lines.append("has_content:")
-        for x in sorted(non_empty, key=lambda i: (-(i.body_chars), i.path.as_posix()))[:10]:
-            out_lines.append(f"- {x.path.as_posix()}  (body_lines={x.body_nonempty_lines}, body_chars={x.body_chars})")
-        out_lines.append("")
-
-    out_lines.append("")
-    out_lines.append("B) 文件同名候选：同文件名（stem）分组中，若存在“仅标题无正文”的文件，且同组有正文文件，则这些仅标题文件为候选删除项。")
-    out_lines.append("")
-    out_lines.append(f"候选组数：{len(stem_candidates)}")
-    out_lines.append("")
-
-    for _, title_only, non_empty in stem_candidates:
-        stem = title_only[0].path.stem
-        out_lines.append(f"== {stem} ==")
-        out_lines.append("title_only:")
-        for x in sorted(title_only, key=lambda i: i.path.as_posix()):
-            out_lines.append(f"- {x.path.as_posix()}")
-        out_lines.append("has_content:")
-        for x in sorted(non_empty, key=lambda i: (-(i.body_chars), i.path.as_posix()))[:10]:
-            out_lines.append(f"- {x.path.as_posix()}  (body_lines={x.body_nonempty_lines}, body_chars={x.body_chars})")
-        out_lines.append("")
-
-    Path("output_title_only_dupes.txt").write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+    with Path("output_title_only_dupes.txt").open("w", encoding="utf-8") as f:
+        f.write("TITLE_ONLY_DUPLICATES_REPORT\n")
+        f.write("\n")
+        f.write("A) 标题同名候选：同标题分组中，若存在“仅标题无正文”的文件，且同组有正文文件，则这些仅标题文件为候选删除项。\n")
+        f.write("\n")
+        f.write(f"候选组数：{len(title_candidates)}\n")
+        f.write("\n")
+
+        for _, title_only, non_empty in title_candidates:
+            title = title_only[0].title
+            f.write(f"== {title} ==\n")
+            f.write("title_only:\n")
+            for x in sorted(title_only, key=lambda i: i.path.as_posix()):
+                f.write(f"- {x.path.as_posix()}\n")
+            f.write("has_content:\n")
+            for x in sorted(non_empty, key=lambda i: (-(i.body_chars), i.path.as_posix()))[:10]:
+                f.write(f"- {x.path.as_posix()}  (body_lines={x.body_nonempty_lines}, body_chars={x.body_chars})\n")
+            f.write("\n")
+
+        f.write("\n")
+        f.write("B) 文件同名候选：同文件名（stem）分组中，若存在“仅标题无正文”的文件，且同组有正文文件，则这些仅标题文件为候选删除项。\n")
+        f.write("\n")
+        f.write(f"候选组数：{len(stem_candidates)}\n")
+        f.write("\n")
+
+        for _, title_only, non_empty in stem_candidates:
+            stem = title_only[0].path.stem
+            f.write(f"== {stem} ==\n")
+            f.write("title_only:\n")
+            for x in sorted(title_only, key=lambda i: i.path.as_posix()):
+                f.write(f"- {x.path.as_posix()}\n")
+            f.write("has_content:\n")
+            for x in sorted(non_empty, key=lambda i: (-(i.body_chars), i.path.as_posix()))[:10]:
+                f.write(f"- {x.path.as_posix()}  (body_lines={x.body_nonempty_lines}, body_chars={x.body_chars})\n")
+            f.write("\n")
+
     print("wrote output_title_only_dupes.txt")
 
 
@@ -10,20 +10,25 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
+import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
-from xml.etree import ElementTree as ET
+from typing import List
 
 
 TABLE_BLOCK_RE = re.compile(r"<table>\s*[\s\S]*?</table>", flags=re.I)
 
 
+SECTION_TAG_RE = re.compile(r"</?(?:tbody|thead|tfoot)\b[^>]*>", flags=re.I)
+
+
 def _xml_sanitize(html: str) -> str:
     html = html.replace("&nbsp;", " ")
-    html = html.replace("<br>", "<br/>").replace("<br />", "<br/>")
-    html = re.sub(r"</?(?:tbody|thead|tfoot)\b[^>]*>", "", html, flags=re.I)
+    # <br> 与上下文无关：预先换成换行符，扫描器就不必处理它
+    html = html.replace("<br>", "\n").replace("<br/>", "\n").replace("<br />", "\n")
+    html = SECTION_TAG_RE.sub("", html)
     return html
 
 
@@ -37,25 +42,36 @@ def _escape_pipes(s: str) -> str:
     return s.replace("|", r"\|")
 
 
-def _iter_cell_parts(node: ET.Element) -> Iterable[str]:
-    if node.text:
-        yield node.text
-    for child in list(node):
-        tag = child.tag.lower()
-        if tag == "br":
-            yield "\n"
-        elif tag == "strong":
-            inner = "".join(_iter_cell_parts(child))
-            if inner.strip():
-                yield f"**{inner.strip()}**"
-        else:
-            yield "".join(_iter_cell_parts(child))
-        if child.tail:
-            yield child.tail
-
-
-def _cell_text(cell: ET.Element) -> str:
-    raw = "".join(_iter_cell_parts(cell))
+_XML_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+TAG_RE = re.compile(
+    r"<(/?)([A-Za-z][\w.:-]*)((?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>"
+)
+ENTITY_RE = re.compile(r"&(?:#x([0-9A-Fa-f]+)|#([0-9]+)|([A-Za-z][\w.-]*));|&")
+# 注释与 CDATA 须在标签匹配之前识别：前者丢弃，后者按原样作为文本
+MARKUP_RE = re.compile(r"<!--[\s\S]*?-->|<!\[CDATA\[([\s\S]*?)\]\]>|" + TAG_RE.pattern)
+
+
+def _unescape(text: str) -> str:
+    # 与 XML 解析器同样严格：游离的 "<"、裸 "&" 和未定义实体都视为错误
+    if "<" in text:
+        raise ValueError(f"unexpected '<' in text: {text[:40]!r}")
+    if "&" not in text:
+        return text
+
+    def repl(m: re.Match) -> str:
+        hex_ref, dec_ref, name = m.groups()
+        if hex_ref:
+            return chr(int(hex_ref, 16))
+        if dec_ref:
+            return chr(int(dec_ref))
+        if name in _XML_ENTITIES:
+            return _XML_ENTITIES[name]
+        raise ValueError(f"undefined entity: {m.group(0)!r}")
+
+    return ENTITY_RE.sub(repl, text)
+
+
+def _cell_text(raw: str) -> str:
     raw = raw.replace("\r\n", "\n").replace("\r", "\n")
     raw = re.sub(r"\n{3,}", "\n\n", raw)
     parts = [p.strip() for p in raw.split("\n")]
@@ -68,25 +84,83 @@ def _cell_text(cell: ET.Element) -> str:
     return text
 
 
+def _scan_rows(html: str) -> List[List[str]] | None:
+    """
+    单遍扫描表格 HTML，直接产出各行单元格文本，不构建 DOM。
+
+    标签必须严格配对（与原先 XML 解析的要求一致），否则抛出 ValueError，
+    由调用方保留原表格不动。
+
+    >>> _scan_rows("<table><tr><td/><td>b</td></tr></table>")
+    [['', 'b']]
+    >>> _scan_rows("<table><tr><td>a<!-- x --></td><td><![CDATA[<b>&]]></td></tr></table>")
+    [['a', '<b>&']]
+    """
+    stack: List[str] = []
+    rows: List[List[str]] = []
+    row: List[str] | None = None
+    # cell 内的文本缓冲区栈：<strong> 会压入新缓冲区，闭合时包成 **...**
+    buffers: List[List[str]] = []
+    seen_table = False
+    pos = 0
+
+    for m in MARKUP_RE.finditer(html):
+        text = _unescape(html[pos : m.start()])
+        if buffers and text:
+            buffers[-1].append(text)
+        pos = m.end()
+
+        cdata, closing, name, _, self_closing = m.groups()
+        if name is None:
+            if buffers and cdata:
+                buffers[-1].append(cdata)
+            continue
+        tag = name.lower()
+
+        if closing:
+            if not stack or stack[-1] != name:
+                raise ValueError(f"mismatched tag: </{name}>")
+            stack.pop()
+            if tag in {"td", "th"} and row is not None and len(buffers) == 1:
+                row.append(_cell_text("".join(buffers.pop())))
+            elif tag == "strong" and len(buffers) > 1:
+                inner = "".join(buffers.pop()).strip()
+                if inner:
+                    buffers[-1].append(f"**{inner}**")
+            elif tag == "tr" and row is not None:
+                if row:
+                    rows.append(row)
+                row = None
+            continue
+
+        if self_closing:
+            if tag in {"td", "th"} and row is not None and stack and stack[-1].lower() == "tr":
+                row.append("")
+            continue
+
+        parent = stack[-1].lower() if stack else ""
+        stack.append(name)
+        if tag == "table":
+            seen_table = True
+        elif tag == "tr":
+            row = []
+        elif tag in {"td", "th"} and parent == "tr" and row is not None:
+            buffers = [[]]
+        elif tag == "strong" and buffers:
+            buffers.append([])
+
+    _unescape(html[pos:])
+    if stack:
+        raise ValueError(f"unclosed tag: <{stack[-1]}>")
+    return rows if seen_table else None
+
+
 def table_html_to_pipe(table_html: str) -> str:
     html = _xml_sanitize(table_html)
-    wrapped = f"<root>{html}</root>"
-    root = ET.fromstring(wrapped)
-    table = root.find(".//table")
-    if table is None:
+    rows = _scan_rows(html)
+    if rows is None:
         return table_html
 
-    rows: List[List[str]] = []
-    for tr in table.findall(".//tr"):
-        cells: List[str] = []
-        for cell in list(tr):
-            tag = cell.tag.lower()
-            if tag not in {"td", "th"}:
-                continue
-            cells.append(_cell_text(cell))
-        if cells:
-            rows.append(cells)
-
     if not rows:
         return ""
 
@@ -119,22 +193,30 @@ class FixResult:
 
 def fix_file(path: Path) -> FixResult:
     text = path.read_text("utf-8")
+    # 多数文件根本没有表格；先做子串判断，比正则扫描便宜得多
+    if "<table" not in text.lower():
+        return FixResult(path, 0, 0)
     blocks = list(TABLE_BLOCK_RE.finditer(text))
     if not blocks:
         return FixResult(path, 0, 0)
 
-    new_text = text
+    parts: List[str] = []
+    last = 0
     converted = 0
-    for m in reversed(blocks):
+    for m in blocks:
         table_html = m.group(0)
         try:
             pipe = table_html_to_pipe(table_html)
         except Exception:
             pipe = table_html
-        new_text = new_text[: m.start()] + pipe + new_text[m.end() :]
+        parts.append(text[last : m.start()])
+        parts.append(pipe)
+        last = m.end()
         if pipe != table_html:
             converted += 1
+    parts.append(text[last:])
 
+    new_text = "".join(parts)
     new_text = new_text.replace("\r\n", "\n")
     new_text = re.sub(r"\n{4,}", "\n\n\n", new_text).strip() + "\n"
 
@@ -152,6 +234,12 @@ def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--docs", default="docs", help="Docs root directory (default: docs)")
     ap.add_argument("--only", default="", help="Only process files whose path contains this substring")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=min(os.cpu_count() or 1, 8),
+        help="Worker processes (default: min(cpu_count, 8))",
+    )
     args = ap.parse_args()
 
     docs_dir = Path(args.docs)
@@ -163,10 +251,10 @@ def main() -> None:
         files = [p for p in files if args.only in str(p)]
 
     results: List[FixResult] = []
-    for p in files:
-        r = fix_file(p)
-        if r.tables_found:
-            results.append(r)
+    with multiprocessing.Pool(max(1, args.workers)) as pool:
+        for r in pool.imap_unordered(fix_file, files, chunksize=8):
+            if r.tables_found:
+                results.append(r)
 
     total_tables = sum(r.tables_found for r in results)
     total_converted = sum(r.tables_converted for r in results)
@@ -186,6 +274,10 @@ import re
 from pathlib import Path
 
 
+# 行内单元格：**粗体** | 特殊文本（如"+1光", "x50%", "升半阶"）| 数字和小数（如6.5, 12.5）
+ROW_TOKEN_RE = re.compile(r'\*\*(?P<bold>[^\*]+)\*\*|(?P<special>[\+\-]?\d+光|x\d+%|升[半\d]+阶)|(?P<num>\d+\.?\d*)')
+
+
 def fix_table_pattern(md_content, pattern_name, header_pattern, data_pattern):
     """修复特定模式的表格"""
     
@@ -402,22 +494,8 @@ def fix_combat_balance_table2(md_content):
             if len(table_rows) >= 2:
                 # 转换为表格格式
                 for idx, row in enumerate(table_rows):
-                    # 提取**粗体**和数字
-                    parts = []
-                    # 提取所有**文本**
-                    bold_matches = re.findall(r'\*\*([^\*]+)\*\*', row)
-                    parts.extend(bold_matches)
-                    
-                    # 提取数字和小数（如6.5, 12.5等）
-                    numbers = re.findall(r'\d+\.?\d*', row)
-                    # 过滤掉已经在粗体中的数字
-                    text_without_bold = re.sub(r'\*\*[^\*]+\*\*', '', row)
-                    numbers_in_text = re.findall(r'\d+\.?\d*', text_without_bold)
-                    parts.extend(numbers_in_text)
-                    
-                    # 提取特殊文本（如"+1光", "x50%", "升半阶"等）
-                    special_texts = re.findall(r'[\+\-]?\d+光|x\d+%|升[半\d]+阶', row)
-                    parts.extend(special_texts)
+                    # 一次扫描按原文顺序提取**粗体**、特殊文本和数字（粗体内的数字不会重复提取）
+                    parts = [m.group(m.lastgroup) for m in ROW_TOKEN_RE.finditer(row)]
                     
                     # 过滤空字符串
                     parts = [p for p in parts if p]
@@ -2,7 +2,8 @@ param(
   [Parameter(Mandatory=$true)][string]$Src,
   [string]$OutDocs = "docs",
   [string]$Assets = "assets",
-  [switch]$Clean
+  [switch]$Clean,
+  [switch]$NoPandocServer
 )
 
 $ErrorActionPreference = "Stop"
@@ -22,6 +23,7 @@ $argsList = @(
   "--target", "github"
 )
 if ($Clean) { $argsList += "--clean" }
+if ($NoPandocServer) { $argsList += "--no-pandoc-server" }
 
 python @argsList
 
@@ -1,14 +1,38 @@
 import argparse
+import base64
+import codecs
+import fnmatch
+import functools
+import http.client
+import json
+import mmap
+import multiprocessing
 import os
+import posixpath
 import re
 import shutil
+import socket
 import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterator
 
 
 IMG_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg"}
+# WinCHM page templates at the export root; never converted
+TEMPLATE_DIRS = {"template", "template2"}
+# Threads for placing images into assets (I/O bound)
+COPY_THREADS = 16
+# `pandoc server` processes shared round-robin by the workers (see PandocServer)
+PANDOC_SERVERS = 4
+# ProcessPoolExecutor refuses more than 61 workers on Windows.
+MAX_WORKERS = 61
 
 
+@functools.lru_cache(maxsize=1)
 def find_pandoc(repo_root: Path) -> str:
     cand = repo_root / "tools" / "Pandoc" / "pandoc.exe"
     if cand.exists():
@@ -16,9 +40,22 @@ def find_pandoc(repo_root: Path) -> str:
     return "pandoc"
 
 
-def detect_encoding(html_bytes: bytes) -> str:
-    # Try meta charset=...
-    m = re.search(br"charset\s*=\s*([A-Za-z0-9_\-]+)", html_bytes[:4096], flags=re.I)
+# Directories this process already created; skips repeated mkdir syscalls per image/page
+_MKDIR_CACHE: set[Path] = set()
+
+
+def ensure_dir(path: Path) -> None:
+    if path not in _MKDIR_CACHE:
+        path.mkdir(parents=True, exist_ok=True)
+        _MKDIR_CACHE.add(path)
+
+
+CHARSET_RE = re.compile(br"charset\s*=\s*([A-Za-z0-9_\-]+)", flags=re.I)
+
+
+def detect_encoding(html_bytes: bytes | mmap.mmap) -> str:
+    # Try meta charset=... (within the first 4 KB, searched in place rather than on a slice)
+    m = CHARSET_RE.search(html_bytes, 0, 4096)
     if m:
         enc = m.group(1).decode("ascii", errors="ignore").lower()
         # Word/WinCHM exports often label as gb2312 but include GBK characters.
@@ -28,12 +65,40 @@ def detect_encoding(html_bytes: bytes) -> str:
     return "utf-8"
 
 
-STYLE_RE = re.compile(r"<style\b[\s\S]*?</style>", flags=re.I)
-SCRIPT_RE = re.compile(r"<script\b[\s\S]*?</script>", flags=re.I)
-SPAN_OPEN_RE = re.compile(r"<span\b[^>]*>", flags=re.I)
-SPAN_CLOSE_RE = re.compile(r"</span\s*>", flags=re.I)
-VML_RE = re.compile(r"</?(?:v|o|w):[^>]*>", flags=re.I)
-COMMENT_RE = re.compile(r"<!--[\s\S]*?-->", flags=re.I)
+@functools.lru_cache(maxsize=None)
+def _decoder(enc: str) -> Callable[..., tuple[str, int]]:
+    # Resolve each codec name once per process instead of on every file
+    info = codecs.lookup(enc)
+    # Same check bytes.decode() does: reject bytes-to-bytes codecs such as "hex"
+    if not getattr(info, "_is_text_encoding", True):
+        raise LookupError(enc)
+    return info.decode
+
+
+def decode_html(html_bytes: bytes | mmap.mmap) -> str:
+    enc = detect_encoding(html_bytes)
+    try:
+        decode = _decoder(enc)
+    except LookupError:
+        decode = _decoder("utf-8")
+    return decode(html_bytes, "replace")[0]
+
+
+def read_html(html_path: Path) -> str:
+    """Decode an HTML file straight from a read-only mapping, without a full-size bytes copy."""
+    with open(html_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return decode_html(b"")  # empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return decode_html(mm)
+
+
+# <style>/<script> blocks and comments, in one pass; the leftmost construct wins, so Word's
+# <!--[if gte mso 9]><style>...</style><![endif]--> goes as a single comment.
+HEAVY_BLOCK_RE = re.compile(
+    r"<(?:style\b[\s\S]*?</style>|script\b[\s\S]*?</script>|!--[\s\S]*?-->)",
+    flags=re.I,
+)
 
 TAG_STRIP_ATTRS = [
     "div",
@@ -57,22 +122,21 @@ TAG_STRIP_ATTRS = [
     "ol",
     "li",
 ]
+# Tags sanitize_word_html rewrites. Every pass uses a fixed replacement or template, so no
+# Python callback runs per match (Word HTML has a tag every few characters).
+WORD_DROP_RE = re.compile(r"</?(?:v|o|w):[^>]*>|<span\b[^>]*>|</span\s*>", flags=re.I)
 TAG_ATTR_RE = re.compile(
     r"<(" + "|".join(TAG_STRIP_ATTRS) + r")\b[^>]*>",
     flags=re.I,
 )
-
-IMG_TAG_RE = re.compile(r"<img\b[^>]*>", flags=re.I)
-IMG_SRC_ONLY_RE = re.compile(r'src\s*=\s*"([^"]+)"', flags=re.I)
-ANCHOR_TAG_RE = re.compile(r"<a\b[^>]*>", flags=re.I)
-ANCHOR_HREF_ONLY_RE = re.compile(r'href\s*=\s*"([^"]+)"', flags=re.I)
+IMG_WITH_SRC_RE = re.compile(r'<img\b[^>]*?src\s*=\s*"([^">]+)"[^>]*>', flags=re.I)
+IMG_WITHOUT_SRC_RE = re.compile(r'<img\b(?![^>]*?src\s*=\s*"[^">]+")[^>]*>', flags=re.I)
+ANCHOR_WITH_HREF_RE = re.compile(r'<a\b[^>]*?href\s*=\s*"([^">]+)"[^>]*>', flags=re.I)
+ANCHOR_WITHOUT_HREF_RE = re.compile(r'<a\b(?![^>]*?href\s*=\s*"[^">]+")[^>]*>', flags=re.I)
 
 
 def strip_heavy_blocks(html: str) -> str:
-    html = STYLE_RE.sub("", html)
-    html = SCRIPT_RE.sub("", html)
-    html = COMMENT_RE.sub("", html)
-    return html
+    return HEAVY_BLOCK_RE.sub("", html)
 
 
 def sanitize_word_html(html: str) -> str:
@@ -84,35 +148,19 @@ def sanitize_word_html(html: str) -> str:
     - shrink <img> to only src
     - shrink <a> to only href
     """
-    html = VML_RE.sub("", html)
-    html = SPAN_OPEN_RE.sub("", html)
-    html = SPAN_CLOSE_RE.sub("", html)
-
+    html = WORD_DROP_RE.sub("", html)
     # Strip attributes from structural tags
-    html = TAG_ATTR_RE.sub(lambda m: f"<{m.group(1)}>", html)
-
-    # Normalize img tags to keep only src
-    def img_repl(m: re.Match) -> str:
-        tag = m.group(0)
-        mm = IMG_SRC_ONLY_RE.search(tag)
-        if not mm:
-            return "<img>"
-        return f"<img src=\"{mm.group(1)}\">"
-
-    html = IMG_TAG_RE.sub(img_repl, html)
-
-    # Normalize anchor tags to keep only href
-    def a_repl(m: re.Match) -> str:
-        tag = m.group(0)
-        mm = ANCHOR_HREF_ONLY_RE.search(tag)
-        if not mm:
-            return "<a>"
-        return f"<a href=\"{mm.group(1)}\">"
-
-    html = ANCHOR_TAG_RE.sub(a_repl, html)
+    html = TAG_ATTR_RE.sub(r"<\1>", html)
+    # Keep only src on img tags
+    html = IMG_WITH_SRC_RE.sub(r'<img src="\1">', html)
+    html = IMG_WITHOUT_SRC_RE.sub("<img>", html)
+    # Keep only href on anchor tags
+    html = ANCHOR_WITH_HREF_RE.sub(r'<a href="\1">', html)
+    html = ANCHOR_WITHOUT_HREF_RE.sub("<a>", html)
     return html
 
 
+EXTERNAL_URL_RE = re.compile(r"^(https?:)?//", flags=re.I)
 IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc\s*=\s*")([^"]+)(")', flags=re.I)
 
 
@@ -132,6 +180,13 @@ def rewrite_and_collect_images(
     Rewrite <img src="..."> to point to assets_root, and return list of copy operations (src_file -> dst_file).
     """
     copy_ops: list[tuple[Path, Path]] = []
+    seen_dst: set[Path] = set()
+
+    # Keep the original relative structure under assets/chm/. Every image of this page lives
+    # below the same directory, so the link prefix is computed once rather than per <img>.
+    rel_under_src_root = src_html_path.parent.relative_to(src_root)
+    dst_dir = assets_root / "chm" / rel_under_src_root
+    base_rel = os.path.relpath(dst_dir, out_md_path.parent).replace("\\", "/")
 
     def repl(m: re.Match) -> str:
         prefix, src, suffix = m.group(1), m.group(2), m.group(3)
@@ -141,24 +196,26 @@ def rewrite_and_collect_images(
 
         src_norm = src.replace("\\", "/")
         # Ignore external URLs/data URIs
-        if re.match(r"^(https?:)?//", src_norm, flags=re.I) or src_norm.startswith("data:"):
+        if EXTERNAL_URL_RE.match(src_norm) or src_norm.startswith("data:"):
             return prefix + src + suffix
 
-        src_file = (src_html_path.parent / src_norm).resolve()
-        if not src_file.exists():
-            # Leave as-is; we'll handle missing manually later
+        # normpath is pure string work; resolve() would stat/readlink every component per image
+        src_file = Path(os.path.normpath(src_html_path.parent / src_norm))
+        if src_file.suffix.lower() not in IMG_EXTS:
             return prefix + src + suffix
 
-        if src_file.suffix.lower() not in IMG_EXTS:
+        if not src_file.is_file():
+            # Leave as-is; we'll handle missing manually later
             return prefix + src + suffix
 
-        # Keep the original relative structure under assets/chm/
-        rel_under_src_root = src_html_path.parent.relative_to(src_root)
-        dst_file = (assets_root / "chm" / rel_under_src_root / src_norm).resolve()
-        dst_file.parent.mkdir(parents=True, exist_ok=True)
-        copy_ops.append((src_file, dst_file))
+        dst_file = Path(os.path.normpath(dst_dir / src_norm))
+        ensure_dir(dst_file.parent)
+        if dst_file not in seen_dst:
+            seen_dst.add(dst_file)
+            copy_ops.append((src_file, dst_file))
 
-        rel_link = os.path.relpath(dst_file, out_md_path.parent).replace("\\", "/")
+        # normpath folds "../" in src the way relpath(dst_file) did
+        rel_link = posixpath.normpath(f"{base_rel}/{src_norm}")
         return prefix + rel_link + suffix
 
     return IMG_SRC_RE.sub(repl, html), copy_ops
@@ -177,6 +234,163 @@ def pandoc_html_to_md(pandoc: str, html_utf8: str) -> str:
     return p.stdout.decode("utf-8", errors="replace")
 
 
+# Documents are joined into one pandoc input, separated by a paragraph holding this token.
+BATCH_TOKEN = "CD985272F78311"
+# Top-level paragraphs only: an indented token sits inside a list/quote, and the resulting
+# count mismatch sends that batch down the per-document path.
+BATCH_SPLIT_RE = re.compile(r"^" + BATCH_TOKEN + r"$", flags=re.M)
+BATCH_SIZE = 200
+BODY_RE = re.compile(r"<body\b[^>]*>([\s\S]*?)(?:</body\s*>|$)", flags=re.I)
+HEAD_RE = re.compile(r"<head\b[\s\S]*?</head\s*>", flags=re.I)
+
+
+def html_body(html: str) -> str:
+    # Only the body may be concatenated; a <head> (e.g. <title>) would leak into the output.
+    m = BODY_RE.search(html)
+    if m:
+        return m.group(1)
+    return HEAD_RE.sub("", html)
+
+
+def pandoc_html_to_md_batch(pandoc: str, htmls: list[str]) -> list[str]:
+    """
+    Convert many HTML documents with a single pandoc process instead of one per file.
+    Falls back to per-document conversion if the output cannot be split back reliably.
+    """
+    if len(htmls) < 2 or any(BATCH_TOKEN in h for h in htmls):
+        return [pandoc_html_to_md(pandoc, h) for h in htmls]
+
+    sep = f"\n\n<p>{BATCH_TOKEN}</p>\n\n"
+    try:
+        md = pandoc_html_to_md(pandoc, sep.join(html_body(h) for h in htmls))
+    except RuntimeError:
+        md = ""
+    parts = BATCH_SPLIT_RE.split(md)
+    if len(parts) != len(htmls):
+        return [pandoc_html_to_md(pandoc, h) for h in htmls]
+
+    out: list[str] = []
+    for part in parts:
+        part = part.strip("\n")
+        out.append(part + "\n" if part else "")
+    return out
+
+
+# `pandoc server` cancels a request after --timeout seconds (pandoc's default is 2, too short for
+# long Word pages while every worker shares the machine); the client waits a little longer.
+PANDOC_SERVER_TIMEOUT = 120
+# The server is on loopback: never route it through http_proxy / the Windows system proxy.
+_LOCAL_OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def pandoc_server_html_to_md(url: str, html_utf8: str) -> str:
+    """Convert one document via a running `pandoc server` (see PandocServer)."""
+    body = json.dumps({"text": html_utf8, "from": "html", "to": "gfm", "wrap": "none"}).encode("utf-8")
+    req = urllib.request.Request(
+        url,
+        data=body,
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    try:
+        with _LOCAL_OPENER.open(req, timeout=PANDOC_SERVER_TIMEOUT + 10) as resp:
+            raw = resp.read()
+            ctype = resp.headers.get("Content-Type", "")
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(e.read().decode("utf-8", errors="replace")) from e
+
+    if not ctype.startswith("application/json"):
+        return raw.decode("utf-8", errors="replace")
+    result = json.loads(raw)
+    if isinstance(result, str):
+        return result
+    if not isinstance(result, dict) or "output" not in result:
+        error = result.get("error") if isinstance(result, dict) else None
+        raise RuntimeError(error or "pandoc server returned no output")
+    if result.get("base64"):
+        return base64.b64decode(result["output"]).decode("utf-8", errors="replace")
+    return result["output"]
+
+
+def pandoc_server_html_to_md_batch(url: str, pandoc: str, htmls: list[str]) -> list[str]:
+    """
+    Convert documents one request each via `pandoc server`. Any document the server fails on
+    (HTTP error, timeout, error reply, dropped connection) is converted with the pandoc CLI
+    instead, so one slow or odd page never aborts the import.
+    """
+    mds: list[str | None] = []
+    for h in htmls:
+        try:
+            mds.append(pandoc_server_html_to_md(url, h))
+        except (RuntimeError, OSError, ValueError, http.client.HTTPException):
+            mds.append(None)
+
+    failed = [i for i, md in enumerate(mds) if md is None]
+    if failed:
+        for i, md in zip(failed, pandoc_html_to_md_batch(pandoc, [htmls[i] for i in failed])):
+            mds[i] = md
+    return mds
+
+
+class PandocServer:
+    """
+    A long-lived `pandoc server` process (pandoc >= 3.0) that converts one document per HTTP request.
+
+    pandoc's CLI only converts once stdin hits EOF, so it cannot be kept alive across files over a
+    pipe; server mode gives the same "start once" benefit with JSON framing instead of a token.
+
+    `pandoc server` has no bind-address option and listens on all interfaces, so while the import
+    runs the port is reachable from the network; pass --no-pandoc-server on untrusted networks.
+    """
+
+    def __init__(self, proc: subprocess.Popen, port: int) -> None:
+        self.proc = proc
+        self.url = f"http://127.0.0.1:{port}/"
+
+    @classmethod
+    def start(cls, pandoc: str, timeout: float = 10.0) -> "PandocServer | None":
+        """Start the server; return None if this pandoc has no server mode or it does not come up."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        try:
+            proc = subprocess.Popen(
+                [pandoc, "server", "--port", str(port), "--timeout", str(PANDOC_SERVER_TIMEOUT)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        server = cls(proc, port)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                return None
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                    pass
+            except OSError:
+                time.sleep(0.1)
+                continue
+            # Something else may have grabbed the port first; then pandoc exits on bind.
+            time.sleep(0.1)
+            return server if proc.poll() is None else None
+        server.close()
+        return None
+
+    def convert(self, html_utf8: str) -> str:
+        return pandoc_server_html_to_md(self.url, html_utf8)
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
 def normalize_md(md: str) -> str:
     md = md.replace("\r\n", "\n")
     # Remove leading blank lines
@@ -186,13 +400,25 @@ def normalize_md(md: str) -> str:
     return md
 
 
-DIV_ONLY_LINE_RE = re.compile(r"^\s*</?div>\s*$", flags=re.I)
-COLGROUP_BLOCK_RE = re.compile(r"<colgroup\b[\s\S]*?</colgroup\s*>", flags=re.I)
-COL_TAG_RE = re.compile(r"<col\b[^>]*>", flags=re.I)
-TABLE_TAG_RE = re.compile(r"<table\b[^>]*>", flags=re.I)
-P_OPEN_RE = re.compile(r"<p\b[^>]*>", flags=re.I)
-P_CLOSE_RE = re.compile(r"</p\s*>", flags=re.I)
-IMG_HTML_RE = re.compile(r"<img\b[^>]*\bsrc\s*=\s*\"([^\"]+)\"[^>]*>", flags=re.I)
+# Everything postprocess_for_github drops or rewrites, as one alternation so the Markdown is scanned once.
+GITHUB_CLEANUP_RE = re.compile(
+    r"(?P<div>^[^\S\n]*</?div>[^\S\n]*(?:\n|\Z))"  # whole line, including its newline
+    r"|(?P<colgroup><colgroup\b[\s\S]*?</colgroup\s*>)"
+    r"|(?P<col><col\b[^>]*>)"
+    r"|(?P<table><table\b[^>]*>)"
+    r"|(?P<img><img\b[^>]*\bsrc\s*=\s*\"(?P<img_src>[^\"]+)\"[^>]*>)"
+    r"|(?P<p><p\b[^>]*>|</p\s*>)",
+    flags=re.I | re.M,
+)
+
+
+def _github_cleanup(m: re.Match) -> str:
+    kind = m.lastgroup
+    if kind == "table":
+        return "<table>"
+    if kind == "img":
+        return f"![]({m.group('img_src')})"
+    return ""  # div / colgroup / col / p
 
 
 def postprocess_for_github(md: str) -> str:
@@ -205,25 +431,7 @@ def postprocess_for_github(md: str) -> str:
     - remove <p> wrappers inside HTML tables (optional but improves readability)
     """
     md = md.replace("\r\n", "\n")
-
-    # Remove line-only div tags
-    lines = []
-    for line in md.split("\n"):
-        if DIV_ONLY_LINE_RE.match(line):
-            continue
-        lines.append(line)
-    md = "\n".join(lines)
-
-    md = COLGROUP_BLOCK_RE.sub("", md)
-    md = COL_TAG_RE.sub("", md)
-    md = TABLE_TAG_RE.sub("<table>", md)
-
-    # Convert img tags to markdown images
-    md = IMG_HTML_RE.sub(lambda m: f"![]({m.group(1)})", md)
-
-    # Remove p wrappers (common in pandoc's HTML table output)
-    md = P_OPEN_RE.sub("", md)
-    md = P_CLOSE_RE.sub("", md)
+    md = GITHUB_CLEANUP_RE.sub(_github_cleanup, md)
 
     # Normalize whitespace again
     md = re.sub(r"\n{4,}", "\n\n\n", md)
@@ -231,11 +439,22 @@ def postprocess_for_github(md: str) -> str:
     return md
 
 
+def iter_htm(src: Path) -> Iterator[Path]:
+    """Yield .htm files under src, pruning the root template dirs instead of walking them."""
+    for dirpath, dirnames, filenames in os.walk(src):
+        if dirpath == str(src):
+            dirnames[:] = [d for d in dirnames if d.lower() not in TEMPLATE_DIRS]
+        for fn in filenames:
+            # fnmatch follows the platform's case rules, like Path.rglob
+            if fnmatch.fnmatch(fn, "*.htm"):
+                yield Path(dirpath) / fn
+
+
 def should_skip_html(rel_path: Path) -> bool:
     parts = [p.lower() for p in rel_path.parts]
     if not parts:
         return True
-    if parts[0] in {"template", "template2"}:
+    if parts[0] in TEMPLATE_DIRS:
         return True
     if rel_path.name.lower() == "header.htm" and rel_path.parent.name.lower().endswith(".files"):
         return True
@@ -245,6 +464,80 @@ def should_skip_html(rel_path: Path) -> bool:
     return False
 
 
+def link_or_copy(src_file: Path, dst_file: Path) -> None:
+    """Hard-link src_file to dst_file (no data copied); fall back to a real copy across devices."""
+    try:
+        os.link(src_file, dst_file)
+    except OSError:
+        # EXDEV (export on another drive), EPERM/ENOTSUP (FS without hard links), ...
+        shutil.copy2(src_file, dst_file)
+
+
+def _copy_if_missing(op: tuple[Path, Path]) -> bool:
+    dst_file, src_file = op
+    if dst_file.exists():
+        return False
+    link_or_copy(src_file, dst_file)
+    return True
+
+
+def convert_shard(
+    html_paths: list[Path],
+    src: Path,
+    out_docs: Path,
+    assets_root: Path,
+    pandoc: str,
+    server_url: str | None,
+    target: str,
+) -> tuple[int, list[tuple[Path, Path]]]:
+    """
+    Convert a shard of .htm files end to end (read, sanitize, one pandoc batch, write .md).
+
+    Runs in a worker process. Returns (converted count, image copy ops); copying is left to the
+    caller so destinations shared between shards are copied once.
+    """
+    jobs: list[tuple[Path, str]] = []
+    all_copy_ops: list[tuple[Path, Path]] = []
+    for html_path in html_paths:
+        out_md = out_docs / html_path.relative_to(src).with_suffix(".md")
+        ensure_dir(out_md.parent)
+
+        html_text = read_html(html_path)
+
+        html_text = strip_heavy_blocks(html_text)
+        html_text = sanitize_word_html(html_text)
+        html_text, copy_ops = rewrite_and_collect_images(html_text, html_path, out_md, assets_root, src)
+        jobs.append((out_md, html_text))
+        all_copy_ops.extend(copy_ops)
+
+    htmls = [html_text for _, html_text in jobs]
+    if server_url is not None:
+        mds = pandoc_server_html_to_md_batch(server_url, pandoc, htmls)
+    else:
+        mds = pandoc_html_to_md_batch(pandoc, htmls)
+    for (out_md, _), md in zip(jobs, mds):
+        md = normalize_md(md)
+        if target == "github":
+            md = postprocess_for_github(md)
+        out_md.write_text(md, encoding="utf-8")
+
+    return len(jobs), all_copy_ops
+
+
+# convert_shard keyword arguments shared by every shard of a run; set by _init_worker
+_WORKER_ARGS: dict = {}
+
+
+def _init_worker(shard_args: dict, server_urls: "multiprocessing.Queue[str | None]") -> None:
+    _WORKER_ARGS.update(shard_args)
+    # Each worker claims one server URL; the URLs are handed out round-robin by main.
+    _WORKER_ARGS["server_url"] = server_urls.get()
+
+
+def _convert_shard_in_worker(html_paths: list[Path]) -> tuple[int, list[tuple[Path, Path]]]:
+    return convert_shard(html_paths, **_WORKER_ARGS)
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--src", required=True, help="WinCHM export root directory (HTML Tree)")
@@ -257,6 +550,20 @@ def main() -> None:
         choices=["github", "raw"],
         help="Postprocess output for target renderer (default: github)",
     )
+    ap.add_argument(
+        "--no-pandoc-server",
+        action="store_true",
+        help="Do not try `pandoc server` (it listens on all interfaces); always use batched pandoc CLI calls",
+    )
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=min(os.cpu_count() or 1, MAX_WORKERS),
+        help=(
+            f"Worker processes for sanitize/convert, sharing up to {PANDOC_SERVERS} pandoc servers "
+            f"(default: CPU count, max {MAX_WORKERS})"
+        ),
+    )
     args = ap.parse_args()
 
     repo_root = Path.cwd()
@@ -271,43 +578,53 @@ def main() -> None:
 
     pandoc = find_pandoc(repo_root)
 
-    html_files = sorted([p for p in src.rglob("*.htm")])
+    html_files = sorted(iter_htm(src))
     if not html_files:
         raise SystemExit(f"No .htm files found under: {src}")
 
-    copied = 0
     converted = 0
 
-    for html_path in html_files:
-        rel = html_path.relative_to(src)
-        if should_skip_html(rel):
-            continue
-
-        out_md = out_docs / rel.with_suffix(".md")
-        out_md.parent.mkdir(parents=True, exist_ok=True)
-
-        data = html_path.read_bytes()
-        enc = detect_encoding(data)
-        try:
-            html_text = data.decode(enc, errors="replace")
-        except LookupError:
-            html_text = data.decode("utf-8", errors="replace")
-
-        html_text = strip_heavy_blocks(html_text)
-        html_text = sanitize_word_html(html_text)
-        html_text, copy_ops = rewrite_and_collect_images(html_text, html_path, out_md, assets_root, src)
-
-        md = pandoc_html_to_md(pandoc, html_text)
-        md = normalize_md(md)
-        if args.target == "github":
-            md = postprocess_for_github(md)
-        out_md.write_text(md, encoding="utf-8")
-        converted += 1
-
-        for s, d in copy_ops:
-            if not d.exists():
-                shutil.copy2(s, d)
-                copied += 1
+    todo = [p for p in html_files if not should_skip_html(p.relative_to(src))]
+    workers = max(1, min(args.workers, MAX_WORKERS))
+    # One shard per pandoc batch, but small enough that every worker gets a share.
+    shard_size = max(1, min(BATCH_SIZE, -(-len(todo) // workers)))
+    shards = [todo[i : i + shard_size] for i in range(0, len(todo), shard_size)]
+    workers = max(1, min(workers, len(shards)))
+
+    # dst -> src; the first file referencing an image wins, like the sequential loop did
+    copy_targets: dict[Path, Path] = {}
+    servers: list[PandocServer] = []
+    if not args.no_pandoc_server:
+        n_servers = min(workers, PANDOC_SERVERS)
+        with ThreadPoolExecutor(max_workers=n_servers) as ex:
+            servers = [srv for srv in ex.map(PandocServer.start, [pandoc] * n_servers) if srv]
+    try:
+        shard_args = dict(
+            src=src,
+            out_docs=out_docs,
+            assets_root=assets_root,
+            pandoc=pandoc,
+            target=args.target,
+        )
+        # With no server up, every worker gets None and uses the batched CLI instead.
+        server_urls = multiprocessing.Queue()
+        for i in range(workers):
+            server_urls.put(servers[i % len(servers)].url if servers else None)
+        # Settings go to each worker once at startup; tasks then only carry their file list.
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(shard_args, server_urls)
+        ) as ex:
+            for n, copy_ops in ex.map(_convert_shard_in_worker, shards):
+                converted += n
+                for s, d in copy_ops:
+                    copy_targets.setdefault(d, s)
+    finally:
+        for server in servers:
+            server.close()
+
+    # Threads overlap the per-file open/link/copy latency; destinations are unique here.
+    with ThreadPoolExecutor(max_workers=COPY_THREADS) as ex:
+        copied = sum(ex.map(_copy_if_missing, copy_targets.items()))
 
     print(f"Converted: {converted} .htm -> .md")
     print(f"Copied images: {copied}")
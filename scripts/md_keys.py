@@ -0,0 +1,34 @@
+"""
+Shared by find_title_only_duplicates.py and build_pdf_chapter_map.py: how docs/**/*.md are
+collected, and the normalization their title/stem match keys are built from.
+"""
+
+from __future__ import annotations
+
+import os
+import unicodedata
+from pathlib import Path
+from typing import Iterator
+
+
+# Every str.isspace() character (what re's \s matched) is below U+3001.
+WHITESPACE = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+# Common punctuation/spaces dropped from match keys
+PUNCT_CHARS = "·•・、，,。．.：:；;！!？?()（）[]【】《》“”\"'‘’`" + WHITESPACE
+SKIP_DIRS = {"assets", "node_modules", ".git"}
+# Generated reports live under docs/ too; never treat them as content.
+EXCLUDE_MD = {"PDF图片索引.md", "PDF章节页码映射.md"}
+
+
+def nfkc(s: str) -> str:
+    # Quick-check first: most titles/stems are already NFKC, so skip building a new string.
+    return s if unicodedata.is_normalized("NFKC", s) else unicodedata.normalize("NFKC", s)
+
+
+def iter_md(root: Path) -> Iterator[Path]:
+    """Yield markdown files under root, pruning asset/vendor directories instead of walking them."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for fn in filenames:
+            if fn.endswith(".md") and fn not in EXCLUDE_MD:
+                yield Path(dirpath) / fn
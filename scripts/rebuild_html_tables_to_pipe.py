@@ -1,12 +1,15 @@
 import argparse
 import re
+from collections import deque
 from dataclasses import dataclass
-
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 
 
 TABLE_BLOCK_RE = re.compile(r"<table\b[\s\S]*?</table\s*>", flags=re.I)
 
+TABLE_TAGS = {"table", "thead", "tbody", "tfoot", "tr", "td", "th"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
 
 def _norm_cell_text(text: str) -> str:
     text = text.replace("\r\n", "\n").replace("\r", "\n")
@@ -26,112 +29,238 @@ class SpanCell:
     text: str
 
 
-def html_table_to_pipe(table_html: str) -> str:
-    soup = BeautifulSoup(table_html, "html5lib")
-    table = soup.find("table")
-    if table is None:
-        return table_html
+def _span_attr(attrs: list[tuple[str, str | None]], name: str) -> int:
+    for k, v in attrs:
+        if k == name:
+            try:
+                return max(1, int(v or 1))
+            except ValueError:
+                return 1
+    return 1
 
-    # Build grid with rowspan/colspan expanded (repeat content to preserve info)
-    span_map: dict[int, SpanCell] = {}
-    grid: list[list[str]] = []
-    header_hint = False
 
-    for tr in table.find_all("tr"):
-        row: list[str] = []
-        col = 0
+def _fill_spans(row: list[str], col: int, span_map: dict[int, SpanCell]) -> int:
+    """Append cells still covered by a rowspan from above, starting at col; return the next free col."""
+    while col in span_map:
+        row.append(span_map[col].text)
+        span_map[col].remaining -= 1
+        if span_map[col].remaining <= 0:
+            del span_map[col]
+        col += 1
+    return col
 
-        def fill_spans():
-            nonlocal col
-            while col in span_map:
-                row.append(span_map[col].text)
-                span_map[col].remaining -= 1
-                if span_map[col].remaining <= 0:
-                    del span_map[col]
-                col += 1
 
-        fill_spans()
+@dataclass
+class _Cell:
+    tag: str
+    rowspan: int
+    colspan: int
+    texts: list[str]
+    # Non-void elements opened inside the cell; an end tag only splits text nodes if it closes one
+    open_tags: list[str]
 
-        cells = tr.find_all(["td", "th"])
-        if tr.find("th") is not None:
-            header_hint = True
 
-        for cell in cells:
-            fill_spans()
-            raw = cell.get_text("\n", strip=True)
-            text = _norm_cell_text(raw)
-            try:
-                rowspan = int(cell.get("rowspan", 1) or 1)
-            except ValueError:
-                rowspan = 1
-            try:
-                colspan = int(cell.get("colspan", 1) or 1)
-            except ValueError:
-                colspan = 1
+@dataclass
+class _Row:
+    cells: list[_Cell]
+    closed: bool = False
 
-            if colspan < 1:
-                colspan = 1
-            if rowspan < 1:
-                rowspan = 1
 
-            for i in range(colspan):
+@dataclass
+class _TableState:
+    row: _Row | None = None
+    cell: _Cell | None = None
+
+
+class PipeTableBuilder(HTMLParser):
+    """
+    Stream one <table> block into pipe-table rows, without building a document tree.
+
+    Mirrors what the old BeautifulSoup/html5lib path saw: <tr>/<td>/<th> implicitly close an
+    open cell/row, stray end tags (e.g. </td> inside a <th>) are ignored, rows of nested
+    tables come in document order and their cells also count for the enclosing row, and a
+    cell's text is its non-empty text nodes (stripped) joined with "\n".
+
+    Each row is span-expanded and classified as soon as it and every row before it are
+    closed (an outer row closes after the rows of a table nested in it).
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.seen_table = False
+        self.saw_th = False
+        self.row_count = 0
+        self.titles: list[str] = []
+        self.body: list[list[str]] = []
+        self.max_cols = 0
+        self._span_map: dict[int, SpanCell] = {}
+        self._pending: deque[_Row] = deque()
+        self._tables: list[_TableState] = []
+        self._data: list[str] = []
+
+    def _flush_text(self) -> None:
+        if not self._data:
+            return
+        t = "".join(self._data).strip()
+        self._data.clear()
+        if t:
+            for st in self._tables:
+                if st.cell is not None:
+                    st.cell.texts.append(t)
+
+    def _open_row(self, st: _TableState) -> None:
+        self._close_row(st)
+        st.row = _Row([])
+        self._pending.append(st.row)
+
+    def _close_row(self, st: _TableState) -> None:
+        st.cell = None
+        if st.row is not None:
+            st.row.closed = True
+            st.row = None
+            while self._pending and self._pending[0].closed:
+                self._emit_row(self._pending.popleft().cells)
+
+    def _emit_row(self, cells: list[_Cell]) -> None:
+        # Expand rowspan/colspan (repeat content to preserve info)
+        self.row_count += 1
+        span_map = self._span_map
+        row: list[str] = []
+        col = _fill_spans(row, 0, span_map)
+
+        for cell in cells:
+            col = _fill_spans(row, col, span_map)
+            text = _norm_cell_text("\n".join(cell.texts))
+            for i in range(cell.colspan):
                 row.append(text)
-                if rowspan > 1:
-                    span_map[col + i] = SpanCell(remaining=rowspan - 1, text=text)
-            col += colspan
-
-        fill_spans()
-        grid.append(row)
-
-    if not grid:
-        return ""
-
-    max_cols = max(len(r) for r in grid)
-    for r in grid:
-        if len(r) < max_cols:
-            r.extend([""] * (max_cols - len(r)))
-
-    # Extract title-like rows that cannot be represented in pipe tables (merged cells).
-    # If a row has a single meaningful value (others empty or same), hoist it as bold text above.
-    titles: list[str] = []
-    body: list[list[str]] = []
-    for r in grid:
-        non_empty = [c for c in r if c.strip()]
-        uniq = sorted(set(non_empty))
-        if len(non_empty) == 1:
-            titles.append(non_empty[0])
-            continue
-        if len(uniq) == 1 and len(non_empty) >= 2:
-            titles.append(uniq[0])
-            continue
-        body.append(r)
-
-    if not body:
-        # Only titles: render as paragraphs
-        return "\n\n".join([f"**{t}**" for t in titles]) + "\n"
-
-    # Decide header row: use first row as header (common in exports), unless it's clearly data-only
-    header = body[0]
-    rows = body[1:]
-
-    # If header_hint is false but header is short phrases and not many empties, still ok.
-    # Create separator
-    sep = ["---"] * max_cols
-
-    def pipe_row(r: list[str]) -> str:
-        return "| " + " | ".join(r) + " |"
-
-    out_lines: list[str] = []
-    for t in titles:
-        out_lines.append(f"**{t}**")
-        out_lines.append("")
-
-    out_lines.append(pipe_row(header))
-    out_lines.append(pipe_row(sep))
-    for r in rows:
-        out_lines.append(pipe_row(r))
-
-    return "\n".join(out_lines) + "\n"
+                if cell.rowspan > 1:
+                    span_map[col + i] = SpanCell(remaining=cell.rowspan - 1, text=text)
+            col += cell.colspan
+
+        _fill_spans(row, col, span_map)
+        self.max_cols = max(self.max_cols, len(row))
+
+        # Extract title-like rows that cannot be represented in pipe tables (merged cells).
+        # If a row has a single meaningful value (others empty or same), hoist it as bold text above.
+        non_empty = [c for c in row if c.strip()]
+        if len(non_empty) == 1 or (len(non_empty) >= 2 and len(set(non_empty)) == 1):
+            self.titles.append(non_empty[0])
+        else:
+            self.body.append(row)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._flush_text()
+        if tag == "table":
+            self.seen_table = True
+            if self._tables and self._tables[-1].cell is None:
+                self._close_row(self._tables.pop())
+            self._tables.append(_TableState())
+            return
+        if not self._tables:
+            return
+        st = self._tables[-1]
+        if tag == "tr":
+            self._open_row(st)
+        elif tag in ("td", "th"):
+            if st.row is None:
+                self._open_row(st)
+            if tag == "th":
+                self.saw_th = True
+            st.cell = _Cell(tag, _span_attr(attrs, "rowspan"), _span_attr(attrs, "colspan"), [], [])
+            # find_all("td") on an outer <tr> also returned cells of nested tables
+            for outer in self._tables:
+                if outer.row is not None:
+                    outer.row.cells.append(st.cell)
+        elif tag in ("thead", "tbody", "tfoot"):
+            self._close_row(st)
+        elif st.cell is not None and tag not in VOID_TAGS:
+            st.cell.open_tags.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        # HTML ignores the self-closing slash on non-void elements
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._tables:
+            return
+        st = self._tables[-1]
+        if st.cell is not None:
+            if tag in ("td", "th"):
+                if st.cell.tag != tag:
+                    # Ignored by the HTML parser, so the text around it stays one node
+                    return
+            elif tag not in TABLE_TAGS:
+                opened = st.cell.open_tags
+                if tag in opened:
+                    del opened[len(opened) - 1 - opened[::-1].index(tag) :]
+                elif tag not in ("p", "br"):
+                    return
+        self._flush_text()
+        if tag == "table":
+            self._close_row(self._tables.pop())
+        elif tag in ("td", "th"):
+            st.cell = None
+        elif tag in ("tr", "thead", "tbody", "tfoot"):
+            self._close_row(st)
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush_text()
+        while self._tables:
+            self._close_row(self._tables.pop())
+
+    def render(self) -> str:
+        if not self.row_count:
+            return ""
+
+        titles = self.titles
+        body = self.body
+        max_cols = self.max_cols
+        header_hint = self.saw_th
+
+        if not body:
+            # Only titles: render as paragraphs
+            return "\n\n".join([f"**{t}**" for t in titles]) + "\n"
+
+        # Pad short rows
+        for r in body:
+            if len(r) < max_cols:
+                r.extend([""] * (max_cols - len(r)))
+
+        # Decide header row: use first row as header (common in exports), unless it's clearly data-only
+        header = body[0]
+        rows = body[1:]
+
+        # If header_hint is false but header is short phrases and not many empties, still ok.
+        # Create separator
+        sep = ["---"] * max_cols
+
+        def pipe_row(r: list[str]) -> str:
+            return "| " + " | ".join(r) + " |"
+
+        out_lines: list[str] = []
+        for t in titles:
+            out_lines.append(f"**{t}**")
+            out_lines.append("")
+
+        out_lines.append(pipe_row(header))
+        out_lines.append(pipe_row(sep))
+        for r in rows:
+            out_lines.append(pipe_row(r))
+
+        return "\n".join(out_lines) + "\n"
+
+
+def html_table_to_pipe(table_html: str) -> str:
+    builder = PipeTableBuilder()
+    builder.feed(table_html)
+    builder.close()
+    if not builder.seen_table:
+        return table_html
+    return builder.render()
 
 
 def rebuild_file(path: str) -> bool:
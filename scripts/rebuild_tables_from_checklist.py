@@ -23,30 +23,40 @@ def parse_todos(checklist_text: str) -> list[str]:
     return paths
 
 
-def mark_done(checklist_text: str, rel_path: str, note: str) -> str:
-    # Mark checkbox
-    checklist_text = checklist_text.replace(f"- [ ] `{rel_path}`", f"- [x] `{rel_path}`", 1)
-
-    # Append note under "### 已完成"
-    parts = checklist_text.splitlines()
-    out = []
-    inserted = False
-    for i, line in enumerate(parts):
-        out.append(line)
-        if not inserted and line.strip() == "### 已完成":
-            # keep following blank lines; append at end of file instead to avoid reordering
-            inserted = True
-    if not inserted:
+def mark_done(checklist_text: str, done: list[tuple[str, str]]) -> str:
+    """Tick every `(rel_path, note)` checkbox and append the notes under "### 已完成", in one pass."""
+    if not done:
+        return checklist_text
+
+    # Mark checkboxes (first unticked occurrence per entry)
+    remaining: dict[str, int] = {}
+    for rel_path, _ in done:
+        remaining[rel_path] = remaining.get(rel_path, 0) + 1
+    box_re = re.compile("|".join(re.escape(f"- [ ] `{rel_path}`") for rel_path in remaining))
+
+    def tick(m: re.Match) -> str:
+        rel_path = m.group(0)[len("- [ ] `") : -1]
+        if remaining[rel_path] <= 0:
+            return m.group(0)
+        remaining[rel_path] -= 1
+        return f"- [x] `{rel_path}`"
+
+    checklist_text = box_re.sub(tick, checklist_text)
+
+    # Append notes under "### 已完成" (at end of file, to avoid reordering)
+    out = checklist_text.splitlines()
+    if not any(line.strip() == "### 已完成" for line in out):
         out.append("")
         out.append("### 已完成")
         out.append("")
 
-    # Ensure there's a blank line before note
-    if out and out[-1].strip() != "":
-        out.append("")
-    out.append(f"- `{rel_path}`：{note}")
+    for rel_path, note in done:
+        # Ensure there's a blank line before note
+        if out and out[-1].strip() != "":
+            out.append("")
+        out.append(f"- `{rel_path}`：{note}")
     out.append("")
-    return "\n".join(out).replace("\r\n", "\n")
+    return "\n".join(out)
 
 
 def main() -> None:
@@ -66,6 +76,7 @@ def main() -> None:
         print("no_pending")
         return
 
+    done: list[tuple[str, str]] = []
     for rel in todos:
         md_path = Path(rel)
         if not md_path.exists():
@@ -75,7 +86,7 @@ def main() -> None:
         table_count = len(TABLE_BLOCK_RE.findall(src))
         if table_count == 0:
             # Already cleaned: just mark done
-            checklist_text = mark_done(checklist_text, rel, "已无 `<table>`（无需重建）")
+            done.append((rel, "已无 `<table>`（无需重建）"))
             continue
 
         rebuild_file(str(md_path))
@@ -83,8 +94,9 @@ def main() -> None:
         if "<table" in new.lower():
             raise SystemExit(f"still_has_table: {rel}")
 
-        checklist_text = mark_done(checklist_text, rel, f"重建 {table_count} 个 HTML table 为 GitHub 管道表（rowspan/colspan 已展开）")
+        done.append((rel, f"重建 {table_count} 个 HTML table 为 GitHub 管道表（rowspan/colspan 已展开）"))
 
+    checklist_text = mark_done(checklist_text, done)
     checklist_path.write_text(checklist_text, encoding="utf-8", newline="\n")
     print("done")
 
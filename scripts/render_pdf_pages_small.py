@@ -1,10 +1,37 @@
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import fitz  # pymupdf
 
 
+def render_pages(
+    pdf_path: str, page_indices: range, out_dir: Path, max_width: int, fmt: str, jpg_quality: int
+) -> int:
+    """Render the given pages into out_dir as page_NNN.<fmt>; return how many were written."""
+    rendered = 0
+    with fitz.open(pdf_path) as doc:
+        for page_idx in page_indices:
+            page_no = page_idx + 1
+            page = doc[page_idx]
+
+            rect = page.rect
+            scale = max_width / rect.width if rect.width else 1.0
+            scale = min(scale, 4.0)  # guardrail
+            mat = fitz.Matrix(scale, scale)
+
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+
+            fname = f"page_{page_no:03d}.{fmt}"
+            out_path = out_dir / fname
+            # Format follows the extension; MuPDF writes straight to the file (no bytes copy).
+            pix.save(str(out_path), jpg_quality=jpg_quality)
+            rendered += 1
+
+    return rendered
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--pdf", required=True, help="PDF path")
@@ -14,38 +41,40 @@ def main() -> None:
     ap.add_argument("--end", type=int, default=0, help="End page (1-based, inclusive). 0 means last page.")
     ap.add_argument("--format", choices=["jpg", "png"], default="jpg", help="Output format")
     ap.add_argument("--jpg-quality", type=int, default=75, help="JPG quality (1-100)")
+    ap.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 6), help="Render processes")
     args = ap.parse_args()
 
     pdf_path = Path(args.pdf)
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    doc = fitz.open(str(pdf_path))
+    with fitz.open(str(pdf_path)) as doc:
+        page_count = doc.page_count
     start = max(1, args.start)
-    end = args.end if args.end and args.end >= start else doc.page_count
-    end = min(end, doc.page_count)
+    end = args.end if args.end and args.end >= start else page_count
+    end = min(end, page_count)
+
+    workers = max(1, args.workers)
+    # A few chunks per worker: page cost varies a lot (full-page art vs. plain text).
+    n = max(0, end - start + 1)
+    chunk = max(1, -(-n // (workers * 4)))
+    chunks = [range(i, min(i + chunk, end)) for i in range(start - 1, end, chunk)]
 
     rendered = 0
-    for page_idx in range(start - 1, end):
-        page_no = page_idx + 1
-        page = doc[page_idx]
-
-        rect = page.rect
-        scale = args.max_width / rect.width if rect.width else 1.0
-        scale = min(scale, 4.0)  # guardrail
-        mat = fitz.Matrix(scale, scale)
-
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-
-        fname = f"page_{page_no:03d}.{args.format}"
-        out_path = out_dir / fname
-        if args.format == "jpg":
-            out_path.write_bytes(pix.tobytes("jpeg", jpg_quality=args.jpg_quality))
-        else:
-            out_path.write_bytes(pix.tobytes("png"))
-        rendered += 1
-
-    print("pdf_pages", doc.page_count)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        results = ex.map(
+            render_pages,
+            [str(pdf_path)] * len(chunks),
+            chunks,
+            [out_dir] * len(chunks),
+            [args.max_width] * len(chunks),
+            [args.format] * len(chunks),
+            [args.jpg_quality] * len(chunks),
+        )
+        for count in results:
+            rendered += count
+
+    print("pdf_pages", page_count)
     print("rendered_pages", rendered)
     print("range", f"{start}-{end}")
     print("out_dir", os.path.abspath(out_dir))